@@ -2,14 +2,25 @@ import os
 import sqlite3
 import logging
 from math import ceil
+from collections import namedtuple  # Для компактних проєкцій записів
 import uuid  # Для генерації унікальних ID помилок
 import cProfile  # Для CPU-профілювання
 import pstats  # Для читання звітів cProfile
 import io  # Для перенаправлення виводу cProfile
+import queue  # Для черги фонового видалення файлів
+import threading  # Для фонового обробника черги
+import time
+import bisect  # Для префіксного індексу імен
+import sys
+import random  # Для вибірки запитів під час профілювання пам'яті
+import tracemalloc  # Для профілювання пам'яті
+import unicodedata  # Для нормалізації імен у підказках
+
+import click
 
 from flask import (
     Flask, render_template, request,
-    redirect, url_for, flash, abort
+    redirect, url_for, flash, abort, jsonify, g
 )
 from flask_login import (
     LoginManager, UserMixin, login_user,
@@ -63,6 +74,25 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'a_very_secret_key_for_diploma_project'
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 
+# Профілювання пам'яті через tracemalloc (вимкнене за замовчуванням)
+# Приклад: set MEMORY_PROFILING=1 та set MEMORY_PROFILING_SAMPLE_RATE=0.05
+# Частота вибірки обмежує лише кількість знімків. Після першого вибраного запиту
+# tracemalloc відстежує всі виділення в усіх запитах, доки його не зупинять
+# через POST /admin/memory/stop.
+app.config['MEMORY_PROFILING'] = os.environ.get('MEMORY_PROFILING', '').lower() in ('1', 'true', 'yes')
+DEFAULT_MEMORY_PROFILING_SAMPLE_RATE = 0.1
+sample_rate_str = os.environ.get('MEMORY_PROFILING_SAMPLE_RATE', str(DEFAULT_MEMORY_PROFILING_SAMPLE_RATE))
+# Некоректне значення не повинно зупиняти запуск додатку - використовуємо значення за замовчуванням
+try:
+    memory_sample_rate = float(sample_rate_str)
+    if not 0 <= memory_sample_rate <= 1:
+        raise ValueError(sample_rate_str)
+except ValueError:
+    logger.warning(f"Некоректне значення MEMORY_PROFILING_SAMPLE_RATE='{sample_rate_str}', "
+                   f"використовується {DEFAULT_MEMORY_PROFILING_SAMPLE_RATE}.")
+    memory_sample_rate = DEFAULT_MEMORY_PROFILING_SAMPLE_RATE
+app.config['MEMORY_PROFILING_SAMPLE_RATE'] = memory_sample_rate
+
 # Додамо конфігурацію для Flask-DebugToolbar (якщо планується використовувати)
 # app.config['DEBUG_TB_INTERCEPT_REDIRECTS'] = False
 # app.config['DEBUG_TB_PROFILER_ENABLED'] = True
@@ -141,6 +171,405 @@ def get_db_connection() -> sqlite3.Connection:
         abort(500)  # Повертаємо 500 Internal Server Error
 
 
+# Покривний індекс для списку тварин: запит каталогу читає лише індекс,
+# не звертаючись до таблиці і не сортуючи результати
+CATALOG_INDEX_SQL = ('CREATE INDEX IF NOT EXISTS idx_animals_catalog '
+                     'ON animals (date_added DESC, type, name, age, image_filename)')
+
+
+def ensure_indexes() -> None:
+    """
+    Створює індекси, яких може не бути в базі, створеній старішою версією init_db.py.
+    Викликається під час імпорту, тож працює і для ``python app.py``, і для ``flask run``.
+    """
+    if not os.path.exists('shelter.db'):
+        logger.warning("Базу даних 'shelter.db' не знайдено, створення індексів пропущено.")
+        return
+    conn = sqlite3.connect('shelter.db')
+    try:
+        conn.execute(CATALOG_INDEX_SQL)
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"Не вдалося створити індекс каталогу (чи виконано init_db.py?). Error: {e}")
+    finally:
+        conn.close()
+
+
+ensure_indexes()
+
+
+# --- ПРОЄКЦІЇ ЗАПИСІВ ПРО ТВАРИН ---
+# Кожне представлення читає лише ті колонки, які йому потрібні
+AnimalCard = namedtuple('AnimalCard', 'id name type age image_filename')
+AnimalDetails = namedtuple('AnimalDetails',
+                           'id name type age gender health_status description image_filename date_added')
+AnimalEdit = namedtuple('AnimalEdit', 'id name type age gender health_status description')
+
+
+def _record_factory(record_cls):
+    """
+    Повертає row_factory, що створює запис ``record_cls`` замість sqlite3.Row.
+    """
+    make = record_cls._make
+    return lambda cursor, row: make(row)
+
+
+def fetch_records(conn: sqlite3.Connection, record_cls, query_tail: str, params=()) -> list:
+    """
+    Виконує ``SELECT <поля record_cls> <query_tail>`` та повертає список записів ``record_cls``.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = _record_factory(record_cls)
+    return cursor.execute(f"SELECT {', '.join(record_cls._fields)} {query_tail}", params).fetchall()
+
+
+def fetch_record(conn: sqlite3.Connection, record_cls, query_tail: str, params=()):
+    """
+    Те саме, що ``fetch_records``, але повертає перший запис або None.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = _record_factory(record_cls)
+    return cursor.execute(f"SELECT {', '.join(record_cls._fields)} {query_tail}", params).fetchone()
+
+
+# --- ФОНОВЕ ВИДАЛЕННЯ ФАЙЛІВ ЗОБРАЖЕНЬ ---
+# Видалення файлів виконується окремим потоком, щоб запит не чекав на файлову
+# систему і не тримав відкритим з'єднання з БД.
+_file_deletion_queue: "queue.Queue[str]" = queue.Queue()
+_file_deletion_worker: threading.Thread | None = None
+_file_deletion_worker_lock = threading.Lock()
+
+# Префікс похідних мініатюр (thumb_<ім'я файлу>), які видаляються разом з оригіналом
+THUMBNAIL_PREFIX = 'thumb_'
+
+
+def _process_file_deletions() -> None:
+    """
+    Обробляє чергу видалення файлів зображень у фоновому потоці.
+    """
+    while True:
+        image_filename = _file_deletion_queue.get()
+        upload_folder = app.config['UPLOAD_FOLDER']
+        image_path = os.path.join(upload_folder, image_filename)
+        try:
+            os.remove(image_path)
+            logger.info(f"Файл зображення '{image_path}' видалено у фоновому режимі.")
+        except FileNotFoundError:
+            logger.warning(f"Файл зображення '{image_path}' не знайдено під час фонового видалення.")
+        except OSError as e:
+            error_id = str(uuid.uuid4())
+            logger.error(f"Помилка фонового видалення файлу '{image_path}' ({error_id}). Error: {e}", exc_info=True)
+
+        # Мініатюра може бути відсутня - це не помилка
+        try:
+            os.remove(os.path.join(upload_folder, THUMBNAIL_PREFIX + image_filename))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Помилка фонового видалення мініатюри для '{image_filename}'. Error: {e}", exc_info=True)
+        finally:
+            _file_deletion_queue.task_done()
+
+
+def schedule_image_deletion(image_filename: str) -> None:
+    """
+    Ставить файл зображення та його мініатюру в чергу на фонове видалення.
+    """
+    global _file_deletion_worker
+    with _file_deletion_worker_lock:
+        if _file_deletion_worker is None or not _file_deletion_worker.is_alive():
+            _file_deletion_worker = threading.Thread(target=_process_file_deletions,
+                                                     name='file-deletion-worker', daemon=True)
+            _file_deletion_worker.start()
+
+    _file_deletion_queue.put(image_filename)
+    logger.debug(f"Зображення '{image_filename}' додано до черги видалення.")
+
+
+# Файл з ім'ям останнього перевіреного файлу, з якого продовжується наступний запуск
+GC_CURSOR_FILE = 'gc_uploads.cursor'
+
+
+def _read_gc_cursor() -> str:
+    try:
+        with open(GC_CURSOR_FILE, encoding='utf-8') as cursor_file:
+            return cursor_file.read().strip()
+    except FileNotFoundError:
+        return ''
+
+
+def _write_gc_cursor(value: str) -> None:
+    with open(GC_CURSOR_FILE, 'w', encoding='utf-8') as cursor_file:
+        cursor_file.write(value)
+
+
+def collect_orphaned_uploads(dry_run: bool = False, batch_size: int = 100, pause: float = 0.1,
+                             min_age: float = 3600.0, max_files: int | None = None) -> dict:
+    """
+    Звіряє папку завантажень з ``animals.image_filename`` та видаляє файли-сироти.
+
+    Файли перевіряються в алфавітному порядку порціями по ``batch_size`` з паузою
+    ``pause`` секунд між ними, щоб не навантажувати диск. Якщо задано ``max_files``,
+    за один запуск перевіряється не більше ``max_files`` файлів, а наступний запуск
+    продовжує з місця зупинки (див. ``GC_CURSOR_FILE``). Файли, молодші за ``min_age``
+    секунд, пропускаються: їх запис у БД може ще не бути збережений.
+    Повертає словник зі статистикою: перевірені файли, сироти та звільнені байти.
+    """
+    if batch_size < 1 or pause < 0 or min_age < 0 or (max_files is not None and max_files < 1):
+        raise ValueError("batch_size та max_files мають бути додатними, pause та min_age - невід'ємними.")
+
+    upload_folder = app.config['UPLOAD_FOLDER']
+    stats = {'scanned': 0, 'orphaned': 0, 'reclaimed_bytes': 0, 'dry_run': dry_run, 'complete': True}
+    if not os.path.isdir(upload_folder):
+        logger.warning(f"Папку завантажень '{upload_folder}' не знайдено, збирання сміття пропущено.")
+        return stats
+
+    conn = sqlite3.connect('shelter.db')
+    try:
+        referenced = {row[0] for row in conn.execute(
+            'SELECT image_filename FROM animals WHERE image_filename IS NOT NULL')}
+    finally:
+        conn.close()
+
+    with os.scandir(upload_folder) as entries:
+        # Розглядаємо лише файли зображень; службові файли (.gitkeep, .htaccess) не чіпаємо
+        filenames = sorted(entry.name for entry in entries
+                           if entry.is_file() and not entry.name.startswith('.') and allowed_file(entry.name))
+    start = bisect.bisect_right(filenames, _read_gc_cursor()) if max_files else 0
+    window = filenames[start:start + max_files] if max_files else filenames[start:]
+    stats['complete'] = start + len(window) >= len(filenames)
+
+    now = time.time()
+    for filename in window:
+        stats['scanned'] += 1
+        if stats['scanned'] % batch_size == 0:
+            time.sleep(pause)
+
+        original_name = filename
+        if original_name.startswith(THUMBNAIL_PREFIX):
+            original_name = original_name[len(THUMBNAIL_PREFIX):]
+        if original_name in referenced:
+            continue
+
+        path = os.path.join(upload_folder, filename)
+        try:
+            file_stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if now - file_stat.st_mtime < min_age:
+            continue
+
+        stats['orphaned'] += 1
+        stats['reclaimed_bytes'] += file_stat.st_size
+        if dry_run:
+            logger.info(f"[dry-run] Файл-сирота '{path}' ({file_stat.st_size} байт).")
+            continue
+        try:
+            os.remove(path)
+            logger.info(f"Видалено файл-сироту '{path}' ({file_stat.st_size} байт).")
+        except OSError as e:
+            stats['orphaned'] -= 1
+            stats['reclaimed_bytes'] -= file_stat.st_size
+            logger.error(f"Не вдалося видалити файл-сироту '{path}'. Error: {e}", exc_info=True)
+
+    # Пробний запуск не зсуває курсор; після повного проходу починаємо спочатку
+    if max_files and not dry_run:
+        _write_gc_cursor('' if stats['complete'] or not window else window[-1])
+
+    logger.info(f"Збирання сміття в '{upload_folder}' завершено: {stats}")
+    return stats
+
+
+@app.cli.command('gc-uploads')
+@click.option('--dry-run', is_flag=True, help='Лише показати файли-сироти, нічого не видаляючи.')
+@click.option('--batch-size', default=100, show_default=True, type=click.IntRange(min=1),
+              help='Кількість файлів між паузами.')
+@click.option('--pause', default=0.1, show_default=True, type=click.FloatRange(min=0),
+              help='Пауза між порціями, секунди.')
+@click.option('--min-age', default=3600.0, show_default=True, type=click.FloatRange(min=0),
+              help='Мінімальний вік файлу-сироти, секунди.')
+@click.option('--max-files', default=None, type=click.IntRange(min=1),
+              help='Перевірити не більше стількох файлів і продовжити з цього місця наступного разу.')
+def gc_uploads_command(dry_run: bool, batch_size: int, pause: float, min_age: float,
+                       max_files: int | None) -> None:
+    """
+    Видаляє з папки завантажень файли, на які не посилається жоден запис у БД.
+    """
+    stats = collect_orphaned_uploads(dry_run=dry_run, batch_size=batch_size,
+                                     pause=pause, min_age=min_age, max_files=max_files)
+    action = 'Можна звільнити' if dry_run else 'Звільнено'
+    click.echo(f"Перевірено файлів: {stats['scanned']}, сиріт: {stats['orphaned']}. "
+               f"{action} {stats['reclaimed_bytes']} байт.")
+    if not stats['complete']:
+        click.echo("Прохід не завершено, наступний запуск продовжить з місця зупинки.")
+
+
+# --- ІНДЕКС ПІДКАЗОК ЗА ІМЕНЕМ ---
+# Ґ зводимо до Г, а різні варіанти апострофа - до звичайного, щоб пошук не
+# залежав від розкладки клавіатури
+_NAME_FOLD_TABLE = str.maketrans({'ґ': 'г', '’': "'", 'ʼ': "'", '`': "'", '´': "'"})
+
+
+def fold_name(name: str) -> str:
+    """
+    Зводить ім'я до форми для пошуку: без регістру, наголосів і діакритики (й -> и, ї -> і).
+    """
+    decomposed = unicodedata.normalize('NFD', name.casefold().translate(_NAME_FOLD_TABLE))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class NamePrefixIndex:
+    """
+    Відсортований у пам'яті масив імен тварин для швидких підказок за префіксом.
+    Будується з ``animals.name`` при першому зверненні і далі оновлюється
+    інкрементально при додаванні, редагуванні та видаленні записів у цьому процесі.
+
+    Зміни, зроблені іншими процесами (наприклад, командами ``flask bulk-edit`` та
+    ``flask bulk-delete``), виявляються через ``PRAGMA data_version`` власного
+    з'єднання індексу: якщо значення змінилось без відомого індексу запису,
+    індекс перебудовується при наступному зверненні.
+    """
+    def __init__(self):
+        self._entries: list[tuple[str, int, str]] = []  # (нормалізоване ім'я, id, ім'я)
+        self._names_by_id: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._built = False
+        self._version = 0  # Збільшується при кожній зміні індексу
+        self._footprint_cache: tuple[int, int] | None = None  # (версія, байти)
+        self._conn: sqlite3.Connection | None = None  # Використовується лише під self._lock
+        self._data_version: int | None = None
+
+    def _read_data_version_locked(self) -> int:
+        if self._conn is None:
+            self._conn = sqlite3.connect('shelter.db', check_same_thread=False)
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _build_locked(self) -> None:
+        # Версію читаємо до вибірки: запис між ними лише спричинить зайву перебудову
+        data_version = self._read_data_version_locked()
+        rows = self._conn.execute('SELECT id, name FROM animals').fetchall()
+        self._names_by_id = {animal_id: str(name) for animal_id, name in rows}
+        self._entries = sorted((fold_name(name), animal_id, name) for animal_id, name in self._names_by_id.items())
+        self._data_version = data_version
+        self._version += 1
+        self._built = True
+
+    def _sync_data_version_locked(self) -> None:
+        """
+        Фіксує поточну версію БД після локального запису, уже відображеного в індексі.
+        Зовнішній запис, що потрапив між комітом і цим викликом, буде помічено
+        лише при наступній зміні БД.
+        """
+        if self._built:
+            self._data_version = self._read_data_version_locked()
+
+    def build(self) -> None:
+        """
+        Завантажує всі імена з БД та будує індекс з нуля.
+        """
+        with self._lock:
+            self._build_locked()
+        logger.info(f"Індекс підказок побудовано: {len(self._entries)} імен, {self.memory_footprint()} байт.")
+
+    def ensure_built(self) -> None:
+        """
+        Будує індекс при першому зверненні або перебудовує його після зовнішніх змін у БД.
+        """
+        with self._lock:
+            if self._built and self._read_data_version_locked() == self._data_version:
+                return
+            reason = 'після зовнішніх змін у БД' if self._built else 'при першому зверненні'
+            self._build_locked()
+        logger.info(f"Індекс підказок побудовано {reason}: {len(self._entries)} імен.")
+
+    def _remove_locked(self, animal_id: int) -> None:
+        name = self._names_by_id.pop(animal_id, None)
+        if name is None:
+            return
+        entry = (fold_name(name), animal_id, name)
+        position = bisect.bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+        self._version += 1
+
+    def add(self, animal_id: int, name: str) -> None:
+        """
+        Додає або оновлює ім'я тварини в індексі.
+        """
+        # Ключ обчислюється до зміни структур, щоб помилка не залишила індекс неузгодженим
+        name = str(name)
+        entry = (fold_name(name), animal_id, name)
+        with self._lock:
+            if not self._built:
+                return  # Запис потрапить до індексу під час побудови
+            self._remove_locked(animal_id)
+            self._names_by_id[animal_id] = name
+            bisect.insort(self._entries, entry)
+            self._version += 1
+            self._sync_data_version_locked()
+
+    def remove(self, animal_id: int) -> None:
+        """
+        Видаляє тварину з індексу.
+        """
+        with self._lock:
+            self._remove_locked(animal_id)
+            self._sync_data_version_locked()
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[str]:
+        """
+        Повертає до ``limit`` унікальних імен, що починаються з ``prefix``, в алфавітному порядку.
+        """
+        self.ensure_built()
+        folded_prefix = fold_name(prefix)
+        if not folded_prefix:
+            return []
+        suggestions = []
+        seen = set()
+        with self._lock:
+            entries = self._entries
+            # Ітеруємо за індексом, щоб не копіювати хвіст списку на кожен запит
+            for position in range(bisect.bisect_left(entries, (folded_prefix,)), len(entries)):
+                folded, _, name = entries[position]
+                if not folded.startswith(folded_prefix) or len(suggestions) >= limit:
+                    break
+                if folded not in seen:
+                    seen.add(folded)
+                    suggestions.append(name)
+        return suggestions
+
+    def memory_footprint(self) -> int:
+        """
+        Оцінює обсяг пам'яті, який займає індекс, у байтах.
+        Результат кешується до наступної зміни індексу; підрахунок виконується
+        над копією списку без утримання блокування.
+        """
+        with self._lock:
+            version = self._version
+            if self._footprint_cache is not None and self._footprint_cache[0] == version:
+                return self._footprint_cache[1]
+            entries = self._entries.copy()
+            names_by_id_size = sys.getsizeof(self._names_by_id)
+
+        total = sys.getsizeof(entries) + names_by_id_size
+        for entry in entries:
+            folded, animal_id, name = entry
+            total += sys.getsizeof(entry) + sys.getsizeof(animal_id) + sys.getsizeof(name)
+            if folded is not name:
+                total += sys.getsizeof(folded)
+
+        with self._lock:
+            if self._version == version:
+                self._footprint_cache = (version, total)
+        return total
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+name_index = NamePrefixIndex()
+
+
 # --- ГЛОБАЛЬНІ ОБРОБНИКИ ПОМИЛОК FLASK ---
 @app.errorhandler(404)
 def page_not_found(e):
@@ -163,6 +592,123 @@ def internal_server_error(e):
     return render_template('500.html', error_id=error_id), 500
 
 
+# --- ПРОФІЛЮВАННЯ ПАМ'ЯТІ ---
+MEMORY_TRACE_FRAMES = 10  # Глибина стеку, що зберігається для кожного виділення
+MEMORY_TOP_SITES = 10  # Кількість найбільших місць виділення у звітах
+_memory_stats: dict[str, dict] = {}
+_memory_stats_lock = threading.Lock()
+_memory_baseline: tracemalloc.Snapshot | None = None
+
+
+def _take_memory_snapshot() -> tracemalloc.Snapshot:
+    """
+    Знімає знімок tracemalloc без виділень самого tracemalloc та механізму імпорту.
+    """
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+
+
+def _format_memory_diff(stat_diffs: list) -> list[dict]:
+    return [{'site': str(stat.traceback[0]), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+            for stat in stat_diffs[:MEMORY_TOP_SITES]]
+
+
+@app.before_request
+def start_memory_sampling() -> None:
+    """
+    Для частини запитів запам'ятовує стан пам'яті перед обробкою.
+    """
+    global _memory_baseline
+    if not app.config['MEMORY_PROFILING'] or random.random() >= app.config['MEMORY_PROFILING_SAMPLE_RATE']:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_TRACE_FRAMES)
+        logger.info("Профілювання пам'яті (tracemalloc) увімкнено.")
+    with _memory_stats_lock:
+        if _memory_baseline is None:
+            _memory_baseline = _take_memory_snapshot()
+    g.memory_snapshot = _take_memory_snapshot()
+    tracemalloc.reset_peak()
+    g.memory_start = tracemalloc.get_traced_memory()[0]
+
+
+@app.teardown_request
+def finish_memory_sampling(exc: BaseException | None) -> None:
+    """
+    Записує чисте та пікове виділення пам'яті для вибраного запиту.
+    Під час паралельних запитів значення включають і виділення інших потоків.
+    """
+    memory_start = g.pop('memory_start', None)
+    memory_snapshot = g.pop('memory_snapshot', None)
+    if memory_start is None or not tracemalloc.is_tracing():
+        return  # Запит не вибрано або відстеження зупинили під час його обробки
+    current, peak = tracemalloc.get_traced_memory()
+    top_sites = _format_memory_diff(_take_memory_snapshot().compare_to(memory_snapshot, 'lineno'))
+    net = current - memory_start
+    peak = peak - memory_start
+    endpoint = request.endpoint or 'unknown'
+
+    with _memory_stats_lock:
+        stats = _memory_stats.setdefault(endpoint, {'samples': 0, 'total_net_bytes': 0, 'max_peak_bytes': 0})
+        stats['samples'] += 1
+        stats['total_net_bytes'] += net
+        stats['max_peak_bytes'] = max(stats['max_peak_bytes'], peak)
+        stats['last_net_bytes'] = net
+        stats['last_peak_bytes'] = peak
+        stats['top_sites'] = top_sites
+    logger.debug(f"Пам'ять для '{endpoint}': net={net} байт, peak={peak} байт.")
+
+
+@app.route('/admin/memory')
+@login_required
+def memory_report():
+    """
+    Повертає статистику пам'яті по роутах і зростання пам'яті від першого вибраного запиту.
+    """
+    if not tracemalloc.is_tracing():
+        return jsonify({'enabled': app.config['MEMORY_PROFILING'], 'tracing': False, 'endpoints': {}})
+
+    current, peak = tracemalloc.get_traced_memory()
+    with _memory_stats_lock:
+        baseline = _memory_baseline
+        endpoints = {}
+        for endpoint, stats in _memory_stats.items():
+            endpoints[endpoint] = dict(stats, avg_net_bytes=stats['total_net_bytes'] // stats['samples'])
+    growth = []
+    if baseline is not None:
+        growth = _format_memory_diff(_take_memory_snapshot().compare_to(baseline, 'lineno'))
+    logger.info(f"Звіт про пам'ять переглянуто. {get_log_context()}")
+    return jsonify({
+        'enabled': app.config['MEMORY_PROFILING'],
+        'tracing': True,
+        'sample_rate': app.config['MEMORY_PROFILING_SAMPLE_RATE'],
+        'traced_current_bytes': current,
+        'traced_peak_bytes': peak,
+        'endpoints': endpoints,
+        'growth_since_baseline': growth,
+    })
+
+
+@app.route('/admin/memory/stop', methods=['POST'])
+@login_required
+def stop_memory_profiling():
+    """
+    Зупиняє tracemalloc і очищає зібрану статистику. Наступний вибраний запит
+    (якщо MEMORY_PROFILING увімкнено) знову запустить відстеження.
+    """
+    global _memory_baseline
+    with _memory_stats_lock:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        _memory_stats.clear()
+        _memory_baseline = None
+    logger.info(f"Профілювання пам'яті (tracemalloc) зупинено. {get_log_context()}")
+    return jsonify({'tracing': False})
+
+
 # --- ДОПОМІЖНА ФУНКЦІЯ ДЛЯ КОНТЕКСТУ ЛОГУВАННЯ ---
 def get_log_context() -> str:
     """
@@ -319,10 +865,10 @@ def index() -> str:
         total_animals = total_animals_cursor.fetchone()[0]
         total_pages = ceil(total_animals / per_page) if total_animals > 0 else 1
 
-        animals_query = f'SELECT * {query_base} ORDER BY date_added DESC LIMIT ? OFFSET ?'
         current_params = list(params)  # Копіюємо params, щоб не змінити оригінальний список для COUNT запиту
         current_params.extend([per_page, offset])
-        animals = conn.execute(animals_query, current_params).fetchall()
+        animals = fetch_records(conn, AnimalCard, f'{query_base} ORDER BY date_added DESC LIMIT ? OFFSET ?',
+                                current_params)
 
         animal_types = conn.execute('SELECT DISTINCT type FROM animals ORDER BY type').fetchall()
         logger.debug(f"Головна сторінка завантажена. Параметри: page={page}, search='{search_query}', type='{type_filter}'. {get_log_context()}")
@@ -367,7 +913,7 @@ def animal_details(animal_id: int) -> str:
     conn = None
     try:
         conn = get_db_connection()
-        animal = conn.execute('SELECT * FROM animals WHERE id = ?', (animal_id,)).fetchone()
+        animal = fetch_record(conn, AnimalDetails, 'FROM animals WHERE id = ?', (animal_id,))
         if animal is None:
             logger.warning(f"Спроба доступу до неіснуючої тварини з ID: {animal_id}. {get_log_context()}")
             abort(404)
@@ -432,15 +978,18 @@ def add_animal() -> str:
 
 
         conn = None
+        animal_saved = False
         try:
             conn = get_db_connection()
-            conn.execute(
+            cursor = conn.execute(
                 'INSERT INTO animals (name, type, age, gender, health_status, '
                 'description, image_filename) VALUES (?, ?, ?, ?, ?, ?, ?)',
                 (name, animal_type, age, gender, health_status, description,
                  image_filename)
             )
             conn.commit()
+            animal_saved = True
+            name_index.add(cursor.lastrowid, name)
             flash(f'Тварину "{name}" успішно додано!', 'success')
             logger.info(f"Користувач '{current_user.username}' успішно додав тварину '{name}'. {get_log_context()}")
             return redirect(url_for('index'))
@@ -455,6 +1004,9 @@ def add_animal() -> str:
         finally:
             if conn:
                 conn.close()
+            # Зображення вже збережене, але запис не створено - прибираємо файл
+            if image_filename and not animal_saved:
+                schedule_image_deletion(image_filename)
 
     return render_template('add_animal.html')
 
@@ -474,7 +1026,7 @@ def edit_animal(animal_id: int) -> str:
     animal = None
     try:
         conn = get_db_connection()
-        animal = conn.execute('SELECT * FROM animals WHERE id = ?', (animal_id,)).fetchone()
+        animal = fetch_record(conn, AnimalEdit, 'FROM animals WHERE id = ?', (animal_id,))
         if animal is None:
             logger.warning(f"Спроба редагувати неіснуючу тварину з ID: {animal_id}. {get_log_context()}")
             abort(404)
@@ -494,6 +1046,7 @@ def edit_animal(animal_id: int) -> str:
                  animal_id)
             )
             conn.commit()
+            name_index.add(animal_id, name)
             flash(f'Дані про "{name}" успішно оновлено!', 'success')
             logger.info(f"Користувач '{current_user.username}' відредагував тварину ID:{animal_id} ('{name}'). {get_log_context()}")
             return redirect(url_for('animal_details', animal_id=animal_id))
@@ -522,7 +1075,7 @@ def delete_animal(animal_id: int) -> str:
     animal_name = "невідома тварина"
     try:
         conn = get_db_connection()
-        animal = conn.execute('SELECT * FROM animals WHERE id = ?', (animal_id,)).fetchone()
+        animal = conn.execute('SELECT name, image_filename FROM animals WHERE id = ?', (animal_id,)).fetchone()
 
         if animal is None:
             logger.warning(f"Спроба видалити неіснуючу тварину з ID: {animal_id}. {get_log_context()}")
@@ -530,21 +1083,16 @@ def delete_animal(animal_id: int) -> str:
 
         animal_name = animal['name']
 
-        if animal['image_filename']:
-            image_path = os.path.join(app.config['UPLOAD_FOLDER'], animal['image_filename'])
-            if os.path.exists(image_path):
-                try:
-                    os.remove(image_path)
-                    logger.info(f"Зображення '{animal['image_filename']}' для тварини '{animal_name}' успішно видалено. {get_log_context()}")
-                except OSError as e:
-                    error_id = str(uuid.uuid4())
-                    logger.error(f"Помилка видалення файлу зображення '{image_path}' для тварини '{animal_name}' ({error_id}). Error: {e}. {get_log_context()}", exc_info=True)
-                    flash(f"Виникла проблема при видаленні файлу зображення (код: {error_id}).", 'warning')
-            else:
-                logger.warning(f"Файл зображення '{image_path}' для тварини '{animal_name}' не знайдено, але запис в БД є. {get_log_context()}")
-
         conn.execute('DELETE FROM animals WHERE id = ?', (animal_id,))
         conn.commit()
+        name_index.remove(animal_id)
+
+        # Файл видаляється у фоні лише після успішного видалення запису
+        # і лише якщо на нього не посилаються інші записи (напр. після populate_db.py)
+        if animal['image_filename'] and conn.execute(
+                'SELECT 1 FROM animals WHERE image_filename = ? LIMIT 1',
+                (animal['image_filename'],)).fetchone() is None:
+            schedule_image_deletion(animal['image_filename'])
         flash(f'Запис про "{animal_name}" було видалено.', 'info')
         logger.info(f"Користувач '{current_user.username}' успішно видалив тварину ID:{animal_id} ('{animal_name}'). {get_log_context()}")
     except sqlite3.Error as e:
@@ -562,6 +1110,292 @@ def delete_animal(animal_id: int) -> str:
     return redirect(url_for('index'))
 
 
+@app.route('/api/suggest')
+def suggest_names():
+    """
+    Повертає підказки імен тварин для пошукового поля за префіксом ``q``.
+    """
+    query = request.args.get('q', '', type=str).strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    try:
+        suggestions = name_index.suggest(query, limit)
+    except sqlite3.Error as e:
+        error_id = str(uuid.uuid4())
+        logger.error(f"Помилка БД ({error_id}) при побудові індексу підказок. Error: {e}. {get_log_context()}", exc_info=True)
+        return jsonify({'error': f"Помилка бази даних (код: {error_id})."}), 500
+    return jsonify({'query': query, 'suggestions': suggestions})
+
+
+@app.route('/api/suggest/stats')
+@login_required
+def suggest_index_stats():
+    """
+    Повертає розмір індексу підказок та оцінку використаної ним пам'яті.
+    """
+    name_index.ensure_built()
+    return jsonify({'entries': len(name_index), 'memory_bytes': name_index.memory_footprint()})
+
+
+# --- МАСОВІ ОПЕРАЦІЇ НАД ЗАПИСАМИ ---
+# Поля, які дозволено змінювати масовим редагуванням
+BULK_EDITABLE_FIELDS = ('name', 'type', 'age', 'gender', 'health_status', 'description')
+# Обов'язкові текстові поля (NOT NULL у таблиці, required у формі додавання)
+BULK_REQUIRED_TEXT_FIELDS = ('name', 'type', 'description')
+# Обмеження кількості параметрів у одному запиті SQLite
+SQLITE_MAX_PARAMS = 500
+
+
+def parse_bulk_ids(raw_ids) -> list[int]:
+    """
+    Перетворює список ID на цілі числа без повторів, зберігаючи порядок.
+    """
+    if not isinstance(raw_ids, (list, tuple)) or not raw_ids:
+        raise ValueError("Потрібен непорожній список ID")
+    animal_ids = []
+    for animal_id in raw_ids:
+        # bool є підкласом int, а float мовчки обрізався б - приймаємо лише цілі числа
+        if type(animal_id) is int:
+            animal_ids.append(animal_id)
+        elif isinstance(animal_id, str) and animal_id.strip().isdecimal():
+            animal_ids.append(int(animal_id))
+        else:
+            raise ValueError(f"Некоректний ID: {animal_id!r}")
+    return list(dict.fromkeys(animal_ids))
+
+
+def validate_bulk_patch(patch) -> dict:
+    """
+    Перевіряє зміни для масового редагування і повертає їх з віком, зведеним до int.
+    """
+    if not isinstance(patch, dict):
+        raise ValueError("Поле 'patch' має бути об'єктом")
+    if not patch:
+        raise ValueError("Не вказано жодного поля для зміни")
+    unknown_fields = set(patch) - set(BULK_EDITABLE_FIELDS)
+    if unknown_fields:
+        raise ValueError(f"Поля не підтримуються масовим редагуванням: {', '.join(sorted(unknown_fields))}")
+
+    validated = {}
+    for field, value in patch.items():
+        if field == 'age':
+            if isinstance(value, str) and value.strip().isdecimal():
+                value = int(value)
+            if type(value) is not int or value < 0:
+                raise ValueError("Поле 'age' має бути невід'ємним цілим числом")
+        elif value is None:
+            if field in BULK_REQUIRED_TEXT_FIELDS:
+                raise ValueError(f"Поле '{field}' не може бути порожнім")
+        elif not isinstance(value, str):
+            raise ValueError(f"Поле '{field}' має бути рядком")
+        elif field in BULK_REQUIRED_TEXT_FIELDS and not value.strip():
+            raise ValueError(f"Поле '{field}' не може бути порожнім")
+        validated[field] = value
+    return validated
+
+
+def _fetch_existing_animals(conn: sqlite3.Connection, animal_ids: list[int]) -> dict[int, str | None]:
+    """
+    Повертає {id: image_filename} для тих ID, які існують у БД.
+    """
+    existing = {}
+    for start in range(0, len(animal_ids), SQLITE_MAX_PARAMS):
+        chunk = animal_ids[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ', '.join('?' * len(chunk))
+        for row in conn.execute(f'SELECT id, image_filename FROM animals WHERE id IN ({placeholders})', chunk):
+            existing[row[0]] = row[1]
+    return existing
+
+
+def bulk_update_animals(conn: sqlite3.Connection, animal_ids: list[int], patch: dict) -> list[dict]:
+    """
+    Застосовує однакові зміни ``patch`` до всіх тварин з ``animal_ids`` однією транзакцією.
+    Повертає результат для кожного ID: ``updated`` або ``not_found``.
+    """
+    patch = validate_bulk_patch(patch)
+    fields = [field for field in BULK_EDITABLE_FIELDS if field in patch]
+    values = [patch[field] for field in fields]
+    set_clause = ', '.join(f'{field} = ?' for field in fields)
+
+    try:
+        # Перевірка існування та зміна записів мають бути в одній транзакції
+        conn.execute('BEGIN IMMEDIATE')
+        existing = _fetch_existing_animals(conn, animal_ids)
+        conn.executemany(f'UPDATE animals SET {set_clause} WHERE id = ?',
+                         [(*values, animal_id) for animal_id in animal_ids if animal_id in existing])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    # Запис уже збережено, тож помилка індексу не повинна перетворитися на 500
+    if 'name' in patch:
+        try:
+            for animal_id in existing:
+                name_index.add(animal_id, patch['name'])
+        except Exception as e:
+            logger.error(f"Не вдалося оновити індекс підказок після масового редагування. Error: {e}", exc_info=True)
+    return [{'id': animal_id, 'status': 'updated' if animal_id in existing else 'not_found'}
+            for animal_id in animal_ids]
+
+
+def bulk_delete_animals(conn: sqlite3.Connection, animal_ids: list[int]) -> list[dict]:
+    """
+    Видаляє всіх тварин з ``animal_ids`` однією транзакцією, а їхні зображення
+    передає на фонове видалення. Повертає результат для кожного ID: ``deleted`` або ``not_found``.
+    """
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        existing = _fetch_existing_animals(conn, animal_ids)
+        conn.executemany('DELETE FROM animals WHERE id = ?', [(animal_id,) for animal_id in existing])
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    try:
+        for animal_id in existing:
+            name_index.remove(animal_id)
+    except Exception as e:
+        logger.error(f"Не вдалося оновити індекс підказок після масового видалення. Error: {e}", exc_info=True)
+
+    # Не видаляємо файли, на які ще посилаються інші записи
+    image_filenames = list({filename for filename in existing.values() if filename})
+    still_referenced = set()
+    for start in range(0, len(image_filenames), SQLITE_MAX_PARAMS):
+        chunk = image_filenames[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ', '.join('?' * len(chunk))
+        still_referenced.update(row[0] for row in conn.execute(
+            f'SELECT DISTINCT image_filename FROM animals WHERE image_filename IN ({placeholders})', chunk))
+    for image_filename in image_filenames:
+        if image_filename not in still_referenced:
+            schedule_image_deletion(image_filename)
+
+    return [{'id': animal_id, 'status': 'deleted' if animal_id in existing else 'not_found'}
+            for animal_id in animal_ids]
+
+
+def _bulk_summary(results: list[dict]) -> dict:
+    """
+    Підраховує кількість результатів кожного типу.
+    """
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return summary
+
+
+@app.route('/bulk/edit', methods=['POST'])
+@login_required
+def bulk_edit_animals():
+    """
+    Масово редагує тварин. Очікує JSON: {"ids": [1, 2], "patch": {"health_status": "..."}}.
+    """
+    payload = request.get_json(silent=True)
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError("Тіло запиту має бути JSON-об'єктом")
+        animal_ids = parse_bulk_ids(payload.get('ids'))
+        patch = validate_bulk_patch(payload.get('patch'))
+    except ValueError as e:
+        logger.warning(f"Некоректний запит масового редагування: {e}. {get_log_context()}")
+        return jsonify({'error': str(e)}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        results = bulk_update_animals(conn, animal_ids, patch)
+        logger.info(f"Користувач '{current_user.username}' масово відредагував тварин: {_bulk_summary(results)}, поля: {sorted(patch)}. {get_log_context()}")
+        return jsonify({'results': results, 'summary': _bulk_summary(results)})
+    except (sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+        logger.warning(f"Дані масового редагування відхилено БД: {e}. {get_log_context()}")
+        return jsonify({'error': f"Некоректні дані: {e}"}), 400
+    except sqlite3.Error as e:
+        error_id = str(uuid.uuid4())
+        logger.error(f"Помилка БД ({error_id}) при масовому редагуванні тварин {animal_ids}. Error: {e}. {get_log_context()}", exc_info=True)
+        return jsonify({'error': f"Помилка бази даних (код: {error_id})."}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
+@app.route('/bulk/delete', methods=['POST'])
+@login_required
+def bulk_delete_animals_route():
+    """
+    Масово видаляє тварин. Очікує JSON: {"ids": [1, 2]}.
+    """
+    payload = request.get_json(silent=True)
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError("Тіло запиту має бути JSON-об'єктом")
+        animal_ids = parse_bulk_ids(payload.get('ids'))
+    except ValueError as e:
+        logger.warning(f"Некоректний запит масового видалення: {e}. {get_log_context()}")
+        return jsonify({'error': str(e)}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        results = bulk_delete_animals(conn, animal_ids)
+        logger.info(f"Користувач '{current_user.username}' масово видалив тварин: {_bulk_summary(results)}. {get_log_context()}")
+        return jsonify({'results': results, 'summary': _bulk_summary(results)})
+    except sqlite3.Error as e:
+        error_id = str(uuid.uuid4())
+        logger.error(f"Помилка БД ({error_id}) при масовому видаленні тварин {animal_ids}. Error: {e}. {get_log_context()}", exc_info=True)
+        return jsonify({'error': f"Помилка бази даних (код: {error_id})."}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
+def _echo_bulk_results(results: list[dict]) -> None:
+    for result in results:
+        click.echo(f"{result['id']}: {result['status']}")
+    click.echo(f"Підсумок: {_bulk_summary(results)}")
+
+
+@app.cli.command('bulk-edit')
+@click.argument('animal_ids', nargs=-1, type=int, required=True)
+@click.option('--set', 'assignments', multiple=True, required=True, metavar='FIELD=VALUE',
+              help='Поле та нове значення, напр. --set health_status=Здоровий.')
+def bulk_edit_command(animal_ids: tuple[int, ...], assignments: tuple[str, ...]) -> None:
+    """
+    Масово змінює поля тварин з вказаними ID.
+    """
+    patch = {}
+    for assignment in assignments:
+        field, separator, value = assignment.partition('=')
+        if not separator:
+            raise click.BadParameter(f"Очікується FIELD=VALUE, отримано '{assignment}'.", param_hint='--set')
+        patch[field.strip()] = value
+
+    conn = get_db_connection()
+    try:
+        results = bulk_update_animals(conn, parse_bulk_ids(animal_ids), patch)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    except (sqlite3.IntegrityError, sqlite3.InterfaceError) as e:
+        raise click.ClickException(f"Некоректні дані: {e}")
+    finally:
+        conn.close()
+    _echo_bulk_results(results)
+
+
+@app.cli.command('bulk-delete')
+@click.argument('animal_ids', nargs=-1, type=int, required=True)
+def bulk_delete_command(animal_ids: tuple[int, ...]) -> None:
+    """
+    Масово видаляє тварин з вказаними ID разом із їхніми зображеннями.
+    """
+    conn = get_db_connection()
+    try:
+        results = bulk_delete_animals(conn, parse_bulk_ids(animal_ids))
+    finally:
+        conn.close()
+    # Чекаємо на фонове видалення файлів, інакше процес завершиться раніше
+    _file_deletion_queue.join()
+    _echo_bulk_results(results)
+
+
 if __name__ == '__main__':
     logger.info("Веб-додаток Притулку для тварин запускається...")
     # Створюємо папку для завантаження, якщо її немає
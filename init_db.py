@@ -35,6 +35,12 @@ CREATE TABLE IF NOT EXISTS animals (
 )
 ''')
 
+# Покривний індекс для списку тварин на головній сторінці
+cursor.execute('''
+CREATE INDEX IF NOT EXISTS idx_animals_catalog
+ON animals (date_added DESC, type, name, age, image_filename)
+''')
+
 # Зберігаємо зміни та закриваємо з'єднання
 connection.commit()
 connection.close()
@@ -40,6 +40,12 @@ CREATE TABLE IF NOT EXISTS animals (
     date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 )
 ''')
+
+# Покривний індекс для списку тварин на головній сторінці
+cursor.execute('''
+CREATE INDEX IF NOT EXISTS idx_animals_catalog
+ON animals (date_added DESC, type, name, age, image_filename)
+''')
 connection.commit()
 
 # --- Генерація користувачів ---